@@ -1,26 +1,35 @@
 #!/usr/bin/env python3
 import sys
+import time
 import asyncio
 import platform
 import argparse
+import functools
+import qasync
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                            QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, QLabel,
+                            QHBoxLayout, QPushButton, QTableView, QLabel,
                             QMessageBox, QTabWidget, QSplitter, QLineEdit, QDialog,
                             QFormLayout, QSpinBox, QDialogButtonBox, QTextEdit, QHeaderView,
                             QSizePolicy)
-from PyQt5.QtCore import Qt, QTimer, QDateTime
-from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt, QTimer
 from bleak_worker import BleakWorker
 from device_tab import DeviceTab
+from device_model import DevRec, DeviceModel, DeviceFilterProxy
 
 # Global debug flag
 DEBUG = False
 
+# Seconds to wait for a characteristic read before reporting a timeout
+READ_TIMEOUT = 5.0
+
 def debug_print(*args, **kwargs):
     """Print only if DEBUG is enabled"""
     if DEBUG:
         print(*args, **kwargs)
 
+# AdvertisementData fields shown in the raw dump
+RAW_ADV_FIELDS = ('local_name', 'manufacturer_data', 'platform_data', 'rssi',
+                  'service_data', 'service_uuids', 'tx_power')
 
 
 class BLEScanner(QMainWindow):
@@ -32,16 +41,18 @@ class BLEScanner(QMainWindow):
         # Initialize BLE worker
         self.ble_worker = BleakWorker()
         self.ble_worker.devices_updated.connect(self.update_device_list)
-        self.ble_worker.advertisement_received.connect(self.process_advertisement)
+        self.ble_worker.advertisements_batched.connect(self.process_advertisements)
         self.ble_worker.connection_updated.connect(self.update_connection_status)
         
         # Dictionary to store advertisement data
         self.device_advertisements = {}  # address -> advertisement_data
         self.ble_worker.services_updated.connect(self.update_services)
         self.ble_worker.characteristic_read.connect(self.update_characteristic_value)
+        self.ble_worker.characteristic_read_failed.connect(self.read_failed)
         self.ble_worker.characteristic_written.connect(self.handle_write_response)
         self.ble_worker.notification_received.connect(self.handle_notification)
         self.ble_worker.error_occurred.connect(self.show_error)
+        self.ble_worker.scan_finished.connect(self.scan_finished)
         self.ble_worker.connection_status_checked.connect(self.handle_connection_check)
         self.ble_worker.start()
         
@@ -62,28 +73,33 @@ class BLEScanner(QMainWindow):
         device_layout = QVBoxLayout(device_widget)
         device_layout.setContentsMargins(0, 0, 0, 0)
         
+        # Discovered devices, filtered by the controls below
+        self.device_model = DeviceModel(self)
+        self.device_proxy = DeviceFilterProxy(self)
+        self.device_proxy.setSourceModel(self.device_model)
+        
         # Filter controls
         filter_layout = QHBoxLayout()
         filter_layout.addWidget(QLabel("Filter:"))
         
         self.name_filter = QLineEdit()
         self.name_filter.setPlaceholderText("Device Name")
-        self.name_filter.textChanged.connect(self.apply_filters)
+        self.name_filter.textChanged.connect(self.device_proxy.set_name_filter)
         filter_layout.addWidget(self.name_filter)
         
         self.mac_filter = QLineEdit()
         self.mac_filter.setPlaceholderText("MAC Address")
-        self.mac_filter.textChanged.connect(self.apply_filters)
+        self.mac_filter.textChanged.connect(self.device_proxy.set_mac_filter)
         filter_layout.addWidget(self.mac_filter)
         
         self.rssi_filter = QLineEdit()
         self.rssi_filter.setPlaceholderText("Min RSSI (e.g. -70)")
-        self.rssi_filter.textChanged.connect(self.apply_filters)
+        self.rssi_filter.textChanged.connect(self.device_proxy.set_min_rssi)
         filter_layout.addWidget(self.rssi_filter)
         
         self.adv_filter = QLineEdit()
         self.adv_filter.setPlaceholderText("Adv Data (hex)")
-        self.adv_filter.textChanged.connect(self.apply_filters)
+        self.adv_filter.textChanged.connect(self.device_proxy.set_adv_hex)
         filter_layout.addWidget(self.adv_filter)
         
         device_layout.addLayout(filter_layout)
@@ -112,12 +128,11 @@ class BLEScanner(QMainWindow):
         
         device_list_layout.addWidget(QLabel("Discovered Devices:"))
         
-        # Create table widget for devices
-        self.device_list = QTableWidget()
-        self.device_list.setColumnCount(4)
-        self.device_list.setHorizontalHeaderLabels(["MAC Address", "Name", "RSSI", "Adv Period"])
-        self.device_list.setSelectionBehavior(QTableWidget.SelectRows)
-        self.device_list.setSelectionMode(QTableWidget.SingleSelection)
+        # Create table view for devices
+        self.device_list = QTableView()
+        self.device_list.setModel(self.device_proxy)
+        self.device_list.setSelectionBehavior(QTableView.SelectRows)
+        self.device_list.setSelectionMode(QTableView.SingleSelection)
         self.device_list.horizontalHeader().setSectionResizeMode(0, QHeaderView.Interactive)
         self.device_list.horizontalHeader().setSectionResizeMode(1, QHeaderView.Interactive)
         self.device_list.horizontalHeader().setSectionResizeMode(2, QHeaderView.Interactive)
@@ -126,8 +141,6 @@ class BLEScanner(QMainWindow):
         self.device_list.setColumnWidth(1, 500)
         self.device_list.setColumnWidth(2, 80)
         self.device_list.setColumnWidth(3, 200)
-        self.name_font = QFont()
-        self.name_font.setBold(True)
         device_list_layout.addWidget(self.device_list)
         
         device_splitter.addWidget(device_list_widget)
@@ -159,7 +172,7 @@ class BLEScanner(QMainWindow):
         device_layout.addLayout(connect_layout)
         
         # Device selection handler
-        self.device_list.itemSelectionChanged.connect(self.device_selected)
+        self.device_list.selectionModel().selectionChanged.connect(self.device_selected)
         
         splitter.addWidget(device_widget)
         
@@ -180,10 +193,20 @@ class BLEScanner(QMainWindow):
         self.scanning = False
         self.scan_timer = QTimer()
         self.scan_timer.timeout.connect(self.stop_scan)
+        self._adv_panel_pending = False
+        self.pending_reads = {}  # Maps (address, char_uuid) -> monotonic time the read was issued
+        self.read_timeout_timer = QTimer(self)
+        self.read_timeout_timer.setInterval(1000)
+        self.read_timeout_timer.timeout.connect(self.check_read_timeouts)
+        
+        # Poll all connected devices from one timer
+        self.connection_check_timer = QTimer(self)
+        self.connection_check_timer.setInterval(2000)
+        self.connection_check_timer.timeout.connect(self.check_connection_status)
+        self.connection_check_timer.start()
         self.current_device = None
-        self.device_tabs_map = {}  # Maps address -> tab index
-        self.adv_timestamps = {}   # Maps address -> list of timestamps
-        self.adv_periods = {}      # Maps address -> calculated period in ms
+        self.device_tabs_by_addr = {}  # Maps address -> DeviceTab
+        self.error_box = None  # Non-modal, reused for every worker error
         
     def toggle_scan(self):
         if not self.scanning:
@@ -194,11 +217,8 @@ class BLEScanner(QMainWindow):
     def start_scan(self):
         self.scanning = True
         self.scan_button.setText("Stop Scan")
-        self.device_list.setRowCount(0)
-        self.all_devices = []
+        self.device_model.clear()
         self.device_advertisements = {}
-        self.adv_timestamps = {}
-        self.adv_periods = {}
         self.statusBar().showMessage("Scanning for devices...")
         self.ble_worker.scan_devices(self.scan_time)
         self.scan_timer.start(self.scan_time)
@@ -207,220 +227,110 @@ class BLEScanner(QMainWindow):
         self.scanning = False
         self.scan_button.setText("Start Scan")
         self.scan_timer.stop()
+        if self.ble_worker.stop_scan():
+            # Re-enabled by scan_finished once the adapter has actually stopped scanning
+            self.scan_button.setEnabled(False)
         self.statusBar().showMessage("Scan stopped")
     
-    def process_advertisement(self, device, advertisement_data):
-        """Process each advertisement as it's received"""
+    def scan_finished(self):
+        """Allow a new scan once the worker's scanner has stopped"""
+        if self.scanning:
+            # The scan ended before the scan timer, e.g. because the adapter failed
+            self.scanning = False
+            self.scan_button.setText("Start Scan")
+            self.scan_timer.stop()
+        self.scan_button.setEnabled(True)
+    
+    def process_advertisements(self, batch):
+        """Process a batch of advertisements collected by the worker, repainting each changed row once"""
         if not self.scanning:
             return
-            
-        # Update device list during scanning
-        if not hasattr(self, 'all_devices'):
-            self.all_devices = []
-            
-        # Check if device is already in the list
-        device_found = False
-        for existing_device in self.all_devices:
-            if hasattr(existing_device, 'address') and hasattr(device, 'address') and existing_device.address == device.address:
-                device_found = True
-                break
         
-        # Add device if not already in the list
-        if not device_found:
-            self.all_devices.append(device)
-            self.apply_filters()
+        changed = {}
+        self.device_list.setUpdatesEnabled(False)
+        try:
+            for summary, device, advertisement_data, timestamp in batch:
+                record = self.process_advertisement(summary, device, advertisement_data, timestamp)
+                if record is not None:
+                    changed[record.address] = record
             
-        address = device.address if hasattr(device, 'address') else str(device)
-        current_time = QDateTime.currentDateTime().toMSecsSinceEpoch()
+            for record in changed.values():
+                self.device_model.record_changed(record)
+        finally:
+            self.device_list.setUpdatesEnabled(True)
         
-        # No need to store advertisement data on device object anymore
+        # Update advertisement data display if the currently selected device changed
+        if self.current_device and hasattr(self.current_device, 'address') and self.current_device.address in changed:
+            self._schedule_adv_panel_refresh()
+    
+    def process_advertisement(self, summary, device, advertisement_data, timestamp):
+        """Process a single advertisement; returns its DevRec if the row needs a repaint"""
+        address = summary.address
         
-        # Store advertisement data
+        # Add device if not already in the list
+        record = self.device_model.get(address)
+        if record is None:
+            # Don't track devices below the RSSI filter at all; known devices still get
+            # updated so their row is hidden once their RSSI drops
+            min_rssi = self.device_proxy.min_rssi
+            rssi = summary.rssi
+            if min_rssi is not None and rssi is not None and rssi < min_rssi:
+                return None
+            record = DevRec(device, address)
+            self.device_model.add(record)
+            
+        period_changed = record.mark_seen(timestamp)
+        
+        # Keep the full advertisement only for the raw data panel; storing the
+        # reference is cheap and keeps the panel's RSSI current
         self.device_advertisements[address] = advertisement_data
         
-        # Update advertisement timestamps
-        if address not in self.adv_timestamps:
-            self.adv_timestamps[address] = []
-        
-        self.adv_timestamps[address].append(current_time)
-        
-        # Keep all timestamps (commented code previously limited to 10)
-        
-        # Calculate period if we have at least 2 timestamps
-        if len(self.adv_timestamps[address]) >= 2:
-            timestamps = self.adv_timestamps[address]
-            periods = [timestamps[i] - timestamps[i-1] for i in range(1, len(timestamps))]
-            min_period = min(periods)
-            self.adv_periods[address] = min_period
-        
-        # Always update the device in the list for each advertisement
-        self.update_device_in_list(address)
-        # Apply filters to refresh the list
-        self.apply_filters()
-            
-        # Update advertisement data display if this is the currently selected device
-        if self.current_device and hasattr(self.current_device, 'address') and self.current_device.address == address:
-            current_item = self.device_list.currentItem()
-            if current_item is not None:
-                self.device_selected(current_item)
-    
-    def update_device_in_list(self, address):
-        """Update a specific device in the list with new advertisement period"""
-        # Find the row with this device
-        for row in range(self.device_list.rowCount()):
-            item = self.device_list.item(row, 0)
-            if item and item.data(Qt.UserRole) and hasattr(item.data(Qt.UserRole), 'address') and item.data(Qt.UserRole).address == address:
-                device = item.data(Qt.UserRole)
-                
-                # Get the device properties
-                name = device.name if hasattr(device, 'name') else "Unknown Device"
-                
-                # Get RSSI
-                device_rssi = None
-                if address in self.device_advertisements:
-                    device_rssi = self.device_advertisements[address].rssi
-                rssi_display = str(device_rssi) if device_rssi is not None else "N/A"
-                
-                # Get advertisement period
-                adv_period = "N/A"
-                if address in self.adv_periods:
-                    adv_period = f"{self.adv_periods[address]:.0f} ms"
-                
-                # Update the cells
-                name_cell = self.device_list.item(row, 1)
-                name_cell.setText(name)
-                name_cell.setFont(self.name_font)
-                self.device_list.item(row, 2).setText(rssi_display)
-                self.device_list.item(row, 3).setText(adv_period)
-                break
+        # Devices re-advertise the same payload many times per second with a slightly
+        # different RSSI each time; fingerprint the payload alone so only the RSSI
+        # needs updating for those
+        fingerprint = hash(summary._replace(rssi=None))
+        if fingerprint == record.fingerprint:
+            rssi_changed = summary.rssi != record.rssi
+            record.rssi = summary.rssi
+            return record if rssi_changed or period_changed else None
+        
+        # New payload: rebuild the name, manufacturer data hex and tooltip
+        record.fingerprint = fingerprint
+        record.update(summary)
+        return record
+    
+    def _schedule_adv_panel_refresh(self):
+        """Coalesce advertisement panel updates for the selected device"""
+        if not self._adv_panel_pending:
+            self._adv_panel_pending = True
+            QTimer.singleShot(200, self._do_adv_panel_refresh)
+    
+    def _do_adv_panel_refresh(self):
+        self._adv_panel_pending = False
+        self._refresh_adv_panel()
     
     def update_device_list(self, devices):
         """Update the device list with all discovered devices"""
-        self.all_devices = devices
-        self.apply_filters()
-    
-    def apply_filters(self):
-        if not hasattr(self, 'all_devices'):
-            return
-        
-        selected_address = None
-        if self.current_device and hasattr(self.current_device, 'address'):
-            selected_address = self.current_device.address
-            
-        self.device_list.setRowCount(0)
-        self.device_list.setHorizontalHeaderLabels(["MAC Address", "Name", "RSSI", "Adv Period"])
-        name_filter = self.name_filter.text().lower()
-        mac_filter = self.mac_filter.text().lower()
-        
-        try:
-            rssi_filter = int(self.rssi_filter.text()) if self.rssi_filter.text() else None
-        except ValueError:
-            rssi_filter = None
-            
-        adv_filter = self.adv_filter.text().strip().lower().replace(" ", "")
-        
-        row = 0
-        for device in self.all_devices:
-            # Get device properties
-            name = device.name if hasattr(device, 'name') else "Unknown Device"
+        records = []
+        for device in devices:
             address = device.address if hasattr(device, 'address') else str(device)
-            
-            # Get RSSI from advertisement data
-            device_rssi = None
-            if address in self.device_advertisements:
-                device_rssi = self.device_advertisements[address].rssi
-            
-            # Apply name filter
-            if name_filter:
-                device_name_lower = (name or "").lower()
-                if name_filter not in device_name_lower:
-                    continue
-            
-            # Apply MAC filter
-            if mac_filter and mac_filter not in address.lower():
-                continue
-                
-            # Apply RSSI filter
-            if rssi_filter is not None and (device_rssi is None or device_rssi < rssi_filter):
-                continue
-
-            # Apply advertisement data filter
-            if adv_filter:
-                mfg_hex = ""
-                
-                # Get manufacturer data from advertisement_data
-                if address in self.device_advertisements and hasattr(self.device_advertisements[address], 'manufacturer_data'):
-                    for company_code, data in self.device_advertisements[address].manufacturer_data.items():
-                        if isinstance(data, (bytes, bytearray)):
-                            mfg_hex += ''.join(f'{b:02x}' for b in data)
-                
-                if adv_filter not in mfg_hex:
-                    continue
-            
-            # Device passed all filters, add to table
-            self.device_list.insertRow(row)
-            
-            # MAC Address
-            mac_item = QTableWidgetItem(address)
-            mac_item.setData(Qt.UserRole, device)
-            self.device_list.setItem(row, 0, mac_item)
-            
-            # Name
-            name_item = QTableWidgetItem(name)
-            name_item.setFont(self.name_font)
-            self.device_list.setItem(row, 1, name_item)
-            
-            # RSSI
-            rssi_display = str(device_rssi) if device_rssi is not None else "N/A"
-            rssi_item = QTableWidgetItem(rssi_display)
-            self.device_list.setItem(row, 2, rssi_item)
-            
-            # Advertisement Period
-            adv_period = "N/A"
-            if address in self.adv_periods:
-                adv_period = f"{self.adv_periods[address]:.0f} ms"
-            period_item = QTableWidgetItem(adv_period)
-            self.device_list.setItem(row, 3, period_item)
-            
-            # Add tooltip to all cells in the row
-            tooltip = ""
-            if address in self.device_advertisements and hasattr(self.device_advertisements[address], 'manufacturer_data'):
-                for company_code, data in self.device_advertisements[address].manufacturer_data.items():
-                    if isinstance(data, (bytes, bytearray)):
-                        tooltip += f"Mfg: 0x{company_code:04x} Data: {' '.join([f'{b:02X}' for b in data])}\n"
-            
-            if tooltip:
-                for col in range(4):
-                    self.device_list.item(row, col).setToolTip(tooltip)
-            
-            row += 1
-        
-        if selected_address:
-            for row_idx in range(self.device_list.rowCount()):
-                item = self.device_list.item(row_idx, 0)
-                if item:
-                    dev = item.data(Qt.UserRole)
-                    if dev and hasattr(dev, 'address') and dev.address == selected_address:
-                        self.device_list.selectRow(row_idx)
-                        break
+            records.append(self.device_model.get(address) or DevRec(device, address))
+        self.device_model.set_records(records)
     
     def device_selected(self):
-        selected_rows = self.device_list.selectedItems()
+        selected_rows = self.device_list.selectionModel().selectedRows()
         if not selected_rows:
             return
             
-        # Get the first selected row
-        row = selected_rows[0].row()
-        
-        # Get the device from the first cell of the selected row
-        item = self.device_list.item(row, 0)
-        if not item:
-            return
-            
-        self.current_device = item.data(Qt.UserRole)
+        # Get the device of the first selected row
+        source_row = self.device_proxy.mapToSource(selected_rows[0]).row()
+        self.current_device = self.device_model.record(source_row).device
         self.connect_button.setEnabled(True)
         
-        # Update advertisement data display
+        self._refresh_adv_panel()
+    
+    def _refresh_adv_panel(self):
+        """Render the advertisement data of the selected device"""
         device = self.current_device
         if device:
             address = device.address if hasattr(device, 'address') else str(device)
@@ -429,12 +339,13 @@ class BLEScanner(QMainWindow):
             adv_text = f"Device: {name} ({address})\n\n"
             
             # Add advertisement period if available
-            if address in self.adv_periods:
-                adv_text += f"Advertisement Period: {self.adv_periods[address]:.0f} ms\n\n"
+            record = self.device_model.get(address)
+            if record is not None and record.period is not None:
+                adv_text += f"Advertisement Period: {record.period:.0f} ms\n\n"
             
             # Display specific advertisement data fields
-            if address in self.device_advertisements:
-                adv_data = self.device_advertisements[address]
+            adv_data = self.device_advertisements.get(address)
+            if adv_data is not None:
                 
                 # RSSI
                 if hasattr(adv_data, 'rssi'):
@@ -451,7 +362,7 @@ class BLEScanner(QMainWindow):
                     adv_text += "Manufacturer Data:\n"
                     for company_code, data in adv_data.manufacturer_data.items():
                         if isinstance(data, (bytes, bytearray)):
-                            hex_data = ' '.join([f'{b:02X}' for b in data])
+                            hex_data = data.hex(' ').upper()
                             adv_text += f"  Company: 0x{company_code:04X}\n  Data: {hex_data}\n\n"
                 
                 # Service UUIDs
@@ -466,7 +377,7 @@ class BLEScanner(QMainWindow):
                     adv_text += "Service Data:\n"
                     for uuid, data in adv_data.service_data.items():
                         if isinstance(data, (bytes, bytearray)):
-                            hex_data = ' '.join([f'{b:02X}' for b in data])
+                            hex_data = data.hex(' ').upper()
                             adv_text += f"  {uuid}: {hex_data}\n"
                     adv_text += "\n"
                 
@@ -485,21 +396,21 @@ class BLEScanner(QMainWindow):
                 # Display raw AdvertisementData content
                 adv_text += "Raw AdvertisementData:\n"
                 
-                # Display all attributes of the AdvertisementData object
-                for attr_name in dir(adv_data):
-                    if not attr_name.startswith('_') and not callable(getattr(adv_data, attr_name)):
+                # Display all fields of the AdvertisementData object
+                for attr_name in RAW_ADV_FIELDS:
+                    if hasattr(adv_data, attr_name):
                         try:
                             attr_value = getattr(adv_data, attr_name)
                             
                             # Format the value based on its type
                             if isinstance(attr_value, (bytes, bytearray)):
-                                formatted_value = ' '.join([f'{b:02X}' for b in attr_value])
+                                formatted_value = attr_value.hex(' ').upper()
                             elif isinstance(attr_value, dict):
                                 # Format dictionaries (like manufacturer_data and service_data)
                                 formatted_value = "{\n"
                                 for k, v in attr_value.items():
                                     if isinstance(v, (bytes, bytearray)):
-                                        v_str = ' '.join([f'{b:02X}' for b in v])
+                                        v_str = v.hex(' ').upper()
                                     else:
                                         v_str = str(v)
                                     formatted_value += f"    {k}: {v_str}\n"
@@ -527,9 +438,10 @@ class BLEScanner(QMainWindow):
             address = device.address if hasattr(device, 'address') else str(device)
             
             # Check if device tab is already open
-            if address in self.device_tabs_map:
+            existing_tab = self.device_tabs_by_addr.get(address)
+            if existing_tab is not None:
                 # Switch to the existing tab
-                self.device_tabs.setCurrentIndex(self.device_tabs_map[address])
+                self.device_tabs.setCurrentWidget(existing_tab)
                 
                 # If not connected, reconnect
                 if address not in self.connected_devices:
@@ -540,38 +452,15 @@ class BLEScanner(QMainWindow):
             # Create a new tab for this device
             device_tab = DeviceTab(device)
             
-            # Connect the tab's action signals to our methods
-            # Create proper method references that capture the current address
-            current_address = address  # Create a local variable to capture the current value
-            
-            # Create handlers with proper binding to the address
-            def read_handler():
-                if device_tab.current_characteristic:
-                    char_uuid = str(device_tab.current_characteristic.uuid)
-                    debug_print(f"Reading characteristic {char_uuid} on {current_address}")
-                    self.statusBar().showMessage(f"Reading characteristic {char_uuid} on {current_address}...")
-                    try:
-                        self.ble_worker.read_characteristic(current_address, char_uuid)
-                        # Set a timeout to clear the status if no response is received
-                        QTimer.singleShot(5000, lambda: self.check_read_timeout(current_address, char_uuid))
-                    except Exception as e:
-                        self.statusBar().showMessage(f"Error reading characteristic: {str(e)}")
-            
-            def write_handler():
-                self.write_characteristic(current_address)
-                
-            def notify_handler():
-                self.toggle_notifications(current_address)
-            
-            # Connect the buttons directly to our handlers
-            device_tab.read_button.clicked.connect(read_handler)
-            device_tab.write_button.clicked.connect(write_handler)
-            device_tab.notify_button.clicked.connect(notify_handler)
+            # Connect the tab's buttons to our methods, bound to this device's address
+            device_tab.read_button.clicked.connect(functools.partial(self.read_characteristic, address))
+            device_tab.write_button.clicked.connect(functools.partial(self.write_characteristic, address))
+            device_tab.notify_button.clicked.connect(functools.partial(self.toggle_notifications, address))
             
             # Add the tab
             device_name = device.name if hasattr(device, 'name') else "Unknown Device"
             tab_index = self.device_tabs.addTab(device_tab, f"{device_name} ({address})")
-            self.device_tabs_map[address] = tab_index
+            self.device_tabs_by_addr[address] = device_tab
             self.device_tabs.setCurrentIndex(tab_index)
             
             # Start connection
@@ -579,96 +468,95 @@ class BLEScanner(QMainWindow):
             self.ble_worker.connect_device(address, self.connection_timeout)
     
     def close_device_tab(self, index):
-        # Get the tab widget
-        tab_widget = self.device_tabs.widget(index)
+        # Get the tab widget and the address it belongs to
+        device_tab = self.device_tabs.widget(index)
+        address = device_tab.address
         
-        # Find the address for this tab
-        address = None
-        for addr, idx in self.device_tabs_map.items():
-            if idx == index:
-                address = addr
-                break
-        
-        if address:
+        if self.device_tabs_by_addr.get(address) is device_tab:
             # Disconnect the device if it's connected
             if address in self.connected_devices:
                 self.ble_worker.disconnect_device(address)
             
-            # Remove from our maps
-            del self.device_tabs_map[address]
-            
-            # Update indices for tabs that come after this one
-            for addr, idx in self.device_tabs_map.items():
-                if idx > index:
-                    self.device_tabs_map[addr] = idx - 1
+            # Remove from our map
+            del self.device_tabs_by_addr[address]
             
             # Remove the tab
             self.device_tabs.removeTab(index)
+            device_tab.deleteLater()
     
     def update_connection_status(self, connected, address, client):
-        if address in self.device_tabs_map:
-            tab_index = self.device_tabs_map[address]
-            device_tab = self.device_tabs.widget(tab_index)
+        device_tab = self.device_tabs_by_addr.get(address)
+        if device_tab is not None:
             
             if connected:
                 self.statusBar().showMessage(f"Connected to {address}")
                 self.connected_devices[address] = client
                 device_tab.set_connected_state(True)
-                # Start checking connection status for this device
+                # Check the new connection right away; connection_check_timer polls it from then on
                 self.check_connection_status(address)
             else:
                 self.statusBar().showMessage(f"Disconnected from {address}")
-                if address in self.connected_devices:
-                    del self.connected_devices[address]
+                self.connected_devices.pop(address, None)
                 device_tab.set_connected_state(False)
     
     def update_services(self, address, services):
-        if address in self.device_tabs_map:
-            tab_index = self.device_tabs_map[address]
-            device_tab = self.device_tabs.widget(tab_index)
+        device_tab = self.device_tabs_by_addr.get(address)
+        if device_tab is not None:
             device_tab.update_services(services)
     
     def read_characteristic(self, address):
-        """Read the selected characteristic on the specified device - used for direct calls from main window"""
-        if address in self.device_tabs_map:
-            tab_index = self.device_tabs_map[address]
-            device_tab = self.device_tabs.widget(tab_index)
+        """Read the selected characteristic on the specified device"""
+        device_tab = self.device_tabs_by_addr.get(address)
+        if device_tab is not None:
             
             if device_tab.current_characteristic:
                 char_uuid = str(device_tab.current_characteristic.uuid)
                 self.statusBar().showMessage(f"Reading characteristic {char_uuid} on {address}...")
-                debug_print(f"Main window reading characteristic {char_uuid}")  # Debug output
+                debug_print(f"Reading characteristic {char_uuid} on {address}")  # Debug output
                 try:
                     self.ble_worker.read_characteristic(address, char_uuid)
-                    # Set a timeout to clear the status if no response is received
-                    QTimer.singleShot(5000, lambda: self.check_read_timeout(address, char_uuid))
+                    self.track_pending_read(address, char_uuid)
                 except Exception as e:
                     self.statusBar().showMessage(f"Error reading characteristic: {str(e)}")
     
-    def check_read_timeout(self, address, char_uuid):
-        """Check if a read operation has timed out"""
-        current_status = self.statusBar().currentMessage()
-        if current_status == f"Reading characteristic {char_uuid} on {address}...":
-            self.statusBar().showMessage(f"Read operation timed out for {char_uuid} on {address}")
+    def track_pending_read(self, address, char_uuid):
+        """Remember when a read was issued so the sweep timer can report a timeout"""
+        self.pending_reads[(address, char_uuid)] = time.monotonic()
+        if not self.read_timeout_timer.isActive():
+            self.read_timeout_timer.start()
+    
+    def check_read_timeouts(self):
+        """Report reads that got no response within READ_TIMEOUT seconds"""
+        now = time.monotonic()
+        for (address, char_uuid), started in list(self.pending_reads.items()):
+            if now - started >= READ_TIMEOUT:
+                del self.pending_reads[(address, char_uuid)]
+                self.statusBar().showMessage(f"Read operation timed out for {char_uuid} on {address}")
+        
+        if not self.pending_reads:
+            self.read_timeout_timer.stop()
+    
+    def read_failed(self, address, char_uuid):
+        """Stop tracking a read the worker reported as failed; the error itself comes via show_error"""
+        self.pending_reads.pop((address, char_uuid), None)
     
     def update_characteristic_value(self, address, char_uuid, value):
         """Update the displayed value for a characteristic"""
         debug_print(f"Received value for {char_uuid} on {address}: {value}")  # Debug output
-        if address in self.device_tabs_map:
-            tab_index = self.device_tabs_map[address]
-            device_tab = self.device_tabs.widget(tab_index)
-            debug_print(f"Updating tab {tab_index} for device {address}")  # Debug output
+        self.pending_reads.pop((address, char_uuid), None)
+        device_tab = self.device_tabs_by_addr.get(address)
+        if device_tab is not None:
+            debug_print(f"Updating tab for device {address}")  # Debug output
             device_tab.update_characteristic_value(char_uuid, value)
             
             # Update status bar
-            hex_value = " ".join([f"{b:02X}" for b in value])
+            hex_value = value.hex(" ").upper()
             self.statusBar().showMessage(f"Read complete for {char_uuid} on {address}: {hex_value}")
     
     def write_characteristic(self, address):
         """Write to the selected characteristic on the specified device"""
-        if address in self.device_tabs_map:
-            tab_index = self.device_tabs_map[address]
-            device_tab = self.device_tabs.widget(tab_index)
+        device_tab = self.device_tabs_by_addr.get(address)
+        if device_tab is not None:
             
             if not device_tab.current_characteristic:
                 return
@@ -680,9 +568,9 @@ class BLEScanner(QMainWindow):
                     QMessageBox.warning(self, "Input Error", "Please enter a hex value")
                     return
                     
-                # Convert hex string to bytes
-                hex_values = hex_text.split()
-                data = bytearray([int(h, 16) for h in hex_values])
+                # Convert hex string to bytes; fromhex allows spaces between byte pairs only,
+                # so a lone nibble like "1 2" is rejected instead of silently merged
+                data = bytes.fromhex(hex_text)
                 
                 char_uuid = str(device_tab.current_characteristic.uuid)
                 properties = device_tab.current_characteristic.properties if hasattr(device_tab.current_characteristic, 'properties') else []
@@ -692,7 +580,7 @@ class BLEScanner(QMainWindow):
                 self.ble_worker.write_characteristic(address, char_uuid, data, with_response)
                 
             except ValueError:
-                QMessageBox.warning(self, "Input Error", "Invalid hex format. Use space-separated hex values (e.g., 01 02 03)")
+                QMessageBox.warning(self, "Input Error", "Invalid hex format. Use two hex digits per byte, optionally space-separated (e.g., 01 02 03 or 010203)")
     
     def handle_write_response(self, address, char_uuid, success):
         """Handle the response from a write operation"""
@@ -703,9 +591,8 @@ class BLEScanner(QMainWindow):
     
     def toggle_notifications(self, address):
         """Toggle notifications for the selected characteristic on the specified device"""
-        if address in self.device_tabs_map:
-            tab_index = self.device_tabs_map[address]
-            device_tab = self.device_tabs.widget(tab_index)
+        device_tab = self.device_tabs_by_addr.get(address)
+        if device_tab is not None:
             
             if not device_tab.current_characteristic:
                 return
@@ -727,24 +614,19 @@ class BLEScanner(QMainWindow):
     
     def handle_notification(self, address, char_uuid, data):
         """Handle a notification from a characteristic"""
-        if address in self.device_tabs_map:
-            tab_index = self.device_tabs_map[address]
-            device_tab = self.device_tabs.widget(tab_index)
+        device_tab = self.device_tabs_by_addr.get(address)
+        if device_tab is not None:
             device_tab.handle_notification(char_uuid, data)
     
-    def try_decode_ascii(self, data):
-        """Try to decode binary data as ASCII or UTF-8"""
-        try:
-            return data.decode('ascii')
-        except:
-            try:
-                return data.decode('utf-8')
-            except:
-                return "(not text)"
-    
     def show_error(self, message):
         self.statusBar().showMessage(message)
-        QMessageBox.warning(self, "Error", message)
+        # Worker errors are emitted from inside asyncio tasks on the qasync loop. A modal
+        # QMessageBox.warning would run a nested event loop in the middle of that task step,
+        # and any other task woken meanwhile would fail to start, so never block here
+        if self.error_box is None:
+            self.error_box = QMessageBox(QMessageBox.Warning, "Error", "", QMessageBox.Ok, self)
+        self.error_box.setText(message)
+        self.error_box.open()
     
     def check_connection_status(self, address=None):
         """Check the connection status of a device or all devices"""
@@ -756,21 +638,16 @@ class BLEScanner(QMainWindow):
             # Check all connected devices
             for addr in list(self.connected_devices.keys()):
                 self.ble_worker.check_connection_status(addr)
-                
-        # Schedule the next check for all devices
-        QTimer.singleShot(2000, lambda: self.check_connection_status())
     
     def handle_connection_check(self, address, is_connected):
         """Handle the result of a connection status check"""
-        if address in self.device_tabs_map:
-            tab_index = self.device_tabs_map[address]
-            device_tab = self.device_tabs.widget(tab_index)
+        device_tab = self.device_tabs_by_addr.get(address)
+        if device_tab is not None:
             
             # If we think we're connected but we're actually not
             if not is_connected and device_tab.connected:
                 self.statusBar().showMessage(f"Device {address} disconnected unexpectedly")
-                if address in self.connected_devices:
-                    del self.connected_devices[address]
+                self.connected_devices.pop(address, None)
                 device_tab.set_connected_state(False)
     
     def show_settings_dialog(self):
@@ -808,24 +685,11 @@ class BLEScanner(QMainWindow):
             self.statusBar().showMessage(f"Settings updated: Scan time: {self.scan_time//1000}s, Connection timeout: {self.connection_timeout//1000}s")
     
     def closeEvent(self, event):
-        # Disconnect all devices
-        for address in list(self.connected_devices.keys()):
-            try:
-                self.ble_worker.disconnect_device(address)
-            except:
-                pass
-            
-        # Clean up BLE worker
-        try:
-            self.ble_worker.quit()
-            self.ble_worker.wait(1000)  # Wait with timeout
-        except Exception as e:
-            print(f"Error during cleanup: {e}")
-        finally:
-            # Force quit if needed
-            if self.ble_worker.isRunning():
-                self.ble_worker.terminate()
-            event.accept()
+        # Devices are disconnected by BleakWorker.shutdown() once the event loop stops
+        self.scan_timer.stop()
+        self.read_timeout_timer.stop()
+        self.connection_check_timer.stop()
+        event.accept()
 
 
 if __name__ == "__main__":
@@ -846,6 +710,14 @@ if __name__ == "__main__":
         asyncio.set_event_loop_policy(asyncio.DefaultEventLoopPolicy())
     
     app = QApplication(sys.argv)
+    
+    # Run asyncio on the Qt event loop so Bleak callbacks are delivered on the GUI thread
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    
     window = BLEScanner()
     window.show()
-    sys.exit(app.exec_())
+    
+    with loop:
+        loop.run_forever()
+        loop.run_until_complete(window.ble_worker.shutdown())
@@ -1,141 +1,161 @@
 #!/usr/bin/env python3
+import time
 import asyncio
-from PyQt5.QtCore import QThread, pyqtSignal
+from collections import namedtuple
+from PyQt5.QtCore import QObject, pyqtSignal
 from bleak import BleakScanner, BleakClient
 from bleak.exc import BleakError
 
-class BleakWorker(QThread):
-    """Worker thread for handling BLE operations"""
+# Seconds a discovered BLEDevice is reused for connecting; random addresses rotate, so don't keep them forever
+DISCOVERED_DEVICE_TTL = 15 * 60
+
+# Seconds advertisements are collected before they are handed to the window in one batch
+ADVERTISEMENT_BATCH_INTERVAL = 0.2
+
+# Notifications buffered per characteristic before new ones are dropped
+NOTIFY_QUEUE_SIZE = 256
+
+# Hashable per-advertisement summary: everything the device list needs, extracted once
+AdvSummary = namedtuple('AdvSummary', 'address name rssi tx_power manufacturer_data service_data service_uuids')
+
+def summarize_advertisement(device, advertisement_data):
+    """Build an AdvSummary; dict fields become tuples of items so the summary can be hashed"""
+    return AdvSummary(
+        device.address,
+        device.name,
+        advertisement_data.rssi,
+        advertisement_data.tx_power,
+        tuple(advertisement_data.manufacturer_data.items()),
+        tuple(advertisement_data.service_data.items()),
+        tuple(advertisement_data.service_uuids),
+    )
+
+class DeviceState:
+    """A connected device's client and its active notification consumers"""
+    __slots__ = ('client', 'notify')
+    
+    def __init__(self, client):
+        self.client = client
+        self.notify = {}  # Dictionary of char_uuid -> consumer task
+    
+    def cancel_consumers(self):
+        for consumer in self.notify.values():
+            consumer.cancel()
+        self.notify.clear()
+
+class BleakWorker(QObject):
+    """Runs BLE operations as a task on the Qt-integrated asyncio event loop"""
     devices_updated = pyqtSignal(list)
-    advertisement_received = pyqtSignal(object, object)  # device, advertisement_data
+    advertisements_batched = pyqtSignal(list)  # [(AdvSummary, device, advertisement_data, timestamp_ms)]
     connection_updated = pyqtSignal(bool, str, object)  # connected, address, client
-    services_updated = pyqtSignal(str, dict)  # address, services
+    services_updated = pyqtSignal(str, object)  # address, BleakGATTServiceCollection
     characteristic_read = pyqtSignal(str, str, bytearray)  # address, char_uuid, value
+    characteristic_read_failed = pyqtSignal(str, str)  # address, char_uuid
     characteristic_written = pyqtSignal(str, str, bool)  # address, char_uuid, success
     notification_received = pyqtSignal(str, str, bytearray)  # address, char_uuid, data
     error_occurred = pyqtSignal(str)
+    scan_finished = pyqtSignal()
     connection_status_checked = pyqtSignal(str, bool)  # address, is_connected
     
     def __init__(self):
         super().__init__()
         self.command_queue = asyncio.Queue()
-        self.clients = {}  # Dictionary of address -> BleakClient
-        self.notification_handlers = {}  # Dictionary of address -> {char_uuid -> handler}
+        self.devices = {}  # Dictionary of address -> DeviceState
+        self.discovered_devices = {}  # Dictionary of address -> (BLEDevice, monotonic time last seen)
+        self.ad_buffer = []  # Advertisements waiting for the next advertisements_batched emit
+        self.ad_flush_handle = None
         self.loop = None
+        self.task = None
+        self.scan_task = None  # Runs beside the command queue so scanning doesn't hold up other commands
+        self.scanner = None  # Created on the first scan and reused, so BlueZ doesn't re-register each time
+        self.scan_devices_dict = {}  # Devices seen during the current scan
         self.connection_check_timer = None
         
-    async def notification_handler(self, address, characteristic, data):
-        self.notification_received.emit(address, str(characteristic), data)
-        
     async def run_ble_loop(self):
         while True:
             command, args = await self.command_queue.get()
             
             try:
-                if command == "scan":
-                    # Use scanner with callback to get all advertisements
-                    scan_time = args[0] if args else 5.0  # Default to 5 seconds if not specified
-                    scan_time_seconds = scan_time / 1000.0 if scan_time > 100 else scan_time  # Convert from ms if needed
-                    
-                    devices_dict = {}
-                    
-                    def detection_callback(device, advertisement_data):
-                        # Store device in dictionary
-                        if device.address not in devices_dict:
-                            devices_dict[device.address] = device
-                        # Emit signal for each advertisement
-                        self.advertisement_received.emit(device, advertisement_data)
-                    
-                    scanner = BleakScanner(detection_callback=detection_callback)
-                    await scanner.start()
-                    await asyncio.sleep(scan_time_seconds)
-                    await scanner.stop()
-                    
-                    # We don't need to emit devices_updated here since we're updating 
-                    # the list with each advertisement via advertisement_received
-                    # devices = list(devices_dict.values())
-                    # self.devices_updated.emit(devices)
-                
-                elif command == "connect":
+                if command == "connect":
                     address = args[0]
                     timeout = args[1] if len(args) > 1 else None
                     
-                    if address in self.clients:
-                        await self.clients[address].disconnect()
+                    old_state = self.devices.pop(address, None)
+                    if old_state is not None:
+                        old_state.cancel_consumers()
+                        await old_state.client.disconnect()
+                    
+                    # Connecting by address string makes Bleak scan for the device first,
+                    # so prefer the BLEDevice from our own scan when we have a recent one
+                    target = self.get_discovered_device(address) or address
                     
                     # Use timeout if provided
                     if timeout:
                         timeout_seconds = timeout / 1000.0  # Convert ms to seconds
-                        client = BleakClient(address, timeout=timeout_seconds)
+                        client = BleakClient(target, timeout=timeout_seconds)
                     else:
-                        client = BleakClient(address)
+                        client = BleakClient(target)
                         
-                    connected = await client.connect()
+                    # connect() returns a bool in older Bleak versions and None since 1.0
+                    await client.connect()
+                    connected = bool(client.is_connected)
                     
                     if connected:
-                        self.clients[address] = client
-                        self.notification_handlers[address] = {}
-                        
-                        services = client.services
-                        # Convert services to a dictionary - handle different Bleak versions
-                        services_dict = {}
-                        if hasattr(services, 'values'):
-                            # For older Bleak versions
-                            services_dict = {str(service.uuid): service for service in services.values()}
-                        else:
-                            # For newer Bleak versions where services is already iterable
-                            services_dict = {str(service.uuid): service for service in services}
+                        self.devices[address] = DeviceState(client)
                         
                         self.connection_updated.emit(connected, address, client)
-                        self.services_updated.emit(address, services_dict)
+                        # The tab walks the collection itself, no need to copy it into a dict
+                        self.services_updated.emit(address, client.services)
                     else:
                         self.connection_updated.emit(False, address, None)
                 
                 elif command == "disconnect":
                     address = args[0]
-                    if address in self.clients and self.clients[address].is_connected:
+                    state = self.get_connected(address)
+                    if state is not None:
                         # Disable all active notifications first
-                        if address in self.notification_handlers:
-                            for char_uuid in list(self.notification_handlers[address].keys()):
-                                await self.clients[address].stop_notify(char_uuid)
-                            self.notification_handlers[address].clear()
+                        for char_uuid in list(state.notify):
+                            await state.client.stop_notify(char_uuid)
+                        state.cancel_consumers()
                         
-                        await self.clients[address].disconnect()
+                        await state.client.disconnect()
                         self.connection_updated.emit(False, address, None)
-                        del self.clients[address]
-                        if address in self.notification_handlers:
-                            del self.notification_handlers[address]
+                        del self.devices[address]
                 
                 elif command == "check_connection":
                     address = args[0]
                     is_connected = False
-                    if address in self.clients:
+                    state = self.devices.get(address)
+                    if state is not None:
                         try:
                             # Convert to bool explicitly to handle _DeprecatedIsConnectedReturn type
-                            is_connected = bool(self.clients[address].is_connected)
-                        except:
+                            is_connected = bool(state.client.is_connected)
+                        except (BleakError, AttributeError, OSError):
                             is_connected = False
                     self.connection_status_checked.emit(address, is_connected)
                 
                 elif command == "read":
                     address, char_uuid = args
-                    if address in self.clients and self.clients[address].is_connected:
+                    state = self.get_connected(address)
+                    if state is not None:
                         try:
                             # Debug output handled by main window
-                            value = await self.clients[address].read_gatt_char(char_uuid)
+                            value = await state.client.read_gatt_char(char_uuid)
                             # Debug output handled by main window
                             # Ensure we're emitting the signal with the correct parameters
                             self.characteristic_read.emit(address, char_uuid, value)
                             # Debug output handled by main window
                         except Exception as e:
                             # Debug output handled by main window
+                            self.characteristic_read_failed.emit(address, char_uuid)
                             self.error_occurred.emit(f"Failed to read characteristic {char_uuid} on device {address}: {str(e)}")
                 
                 elif command == "write":
                     address, char_uuid, value, response = args
-                    if address in self.clients and self.clients[address].is_connected:
+                    state = self.get_connected(address)
+                    if state is not None:
                         try:
-                            await self.clients[address].write_gatt_char(char_uuid, value, response)
+                            await state.client.write_gatt_char(char_uuid, value, response)
                             self.characteristic_written.emit(address, char_uuid, True)
                         except Exception as e:
                             self.error_occurred.emit(f"Failed to write to characteristic {char_uuid} on device {address}: {str(e)}")
@@ -143,27 +163,34 @@ class BleakWorker(QThread):
                 
                 elif command == "start_notify":
                     address, char_uuid = args
-                    if address in self.clients and self.clients[address].is_connected:
-                        # Create a notification handler for this specific device/characteristic
-                        handler = lambda sender, data: asyncio.create_task(
-                            self.notification_handler(address, sender, data)
-                        )
+                    state = self.get_connected(address)
+                    if state is not None:
+                        # Bleak's callback only queues the data; one consumer task per characteristic
+                        # emits it, so a fast notify stream can't flood the loop with work
+                        queue = asyncio.Queue(maxsize=NOTIFY_QUEUE_SIZE)
+                        
+                        def handler(sender, data, _queue=queue):
+                            try:
+                                _queue.put_nowait(data)
+                            except asyncio.QueueFull:
+                                pass  # The window isn't keeping up; drop rather than grow without bound
                         
-                        await self.clients[address].start_notify(char_uuid, handler)
+                        await state.client.start_notify(char_uuid, handler)
                         
-                        if address not in self.notification_handlers:
-                            self.notification_handlers[address] = {}
-                        self.notification_handlers[address][char_uuid] = True
+                        # The sender's str() is not the plain UUID the device tabs match on, so bind it here
+                        consumer = self.loop.create_task(self.consume_notifications(address, str(char_uuid), queue))
+                        # A repeated subscription replaces Bleak's callback, so retire the old consumer
+                        old_consumer = state.notify.pop(char_uuid, None)
+                        if old_consumer is not None:
+                            old_consumer.cancel()
+                        state.notify[char_uuid] = consumer
                 
                 elif command == "stop_notify":
                     address, char_uuid = args
-                    if (address in self.clients and 
-                        self.clients[address].is_connected and 
-                        address in self.notification_handlers and 
-                        char_uuid in self.notification_handlers[address]):
-                        
-                        await self.clients[address].stop_notify(char_uuid)
-                        del self.notification_handlers[address][char_uuid]
+                    state = self.get_connected(address)
+                    if state is not None and char_uuid in state.notify:
+                        await state.client.stop_notify(char_uuid)
+                        state.notify.pop(char_uuid).cancel()
                         
             except BleakError as e:
                 self.error_occurred.emit(f"BLE Error: {str(e)}")
@@ -178,32 +205,162 @@ class BleakWorker(QThread):
                 
             self.command_queue.task_done()
     
-    def run(self):
-        self.loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.loop)
-        self.loop.run_until_complete(self.run_ble_loop())
+    async def consume_notifications(self, address, char_uuid, queue):
+        """Emit the notifications Bleak queued for one characteristic"""
+        while True:
+            data = await queue.get()
+            self.notification_received.emit(address, char_uuid, data)
+            # Emit the rest of a burst before going back to the loop
+            while not queue.empty():
+                self.notification_received.emit(address, char_uuid, queue.get_nowait())
+    
+    async def run_scan(self, scan_time):
+        """Scan for scan_time (ms or s), queueing every advertisement for the window"""
+        # Use scanner with callback to get all advertisements
+        scan_time = scan_time or 5.0  # Default to 5 seconds if not specified
+        scan_time_seconds = scan_time / 1000.0 if scan_time > 100 else scan_time  # Convert from ms if needed
+        
+        self.scan_devices_dict = {}
+        self.expire_discovered_devices()
+        
+        try:
+            if self.scanner is None:
+                self.scanner = BleakScanner(detection_callback=self.detection_callback)
+            await self.scanner.start()
+            try:
+                await asyncio.sleep(scan_time_seconds)
+            finally:
+                # Also runs when stop_scan() cancels us
+                await self.scanner.stop()
+        except BleakError as e:
+            self.scanner = None  # Don't reuse a scanner the backend has failed on
+            self.error_occurred.emit(f"BLE Error: {str(e)}")
+        except Exception as e:
+            self.scanner = None
+            self.error_occurred.emit(f"Error: {str(e)}")
+        finally:
+            self.scan_finished.emit()
+        
+        # We don't need to emit devices_updated here since we're updating 
+        # the list with each advertisement via advertisements_batched
+        # devices = list(self.scan_devices_dict.values())
+        # self.devices_updated.emit(devices)
+    
+    def detection_callback(self, device, advertisement_data):
+        # Store device in dictionary
+        if device.address not in self.scan_devices_dict:
+            self.scan_devices_dict[device.address] = device
+        # Remember the BLEDevice so connecting doesn't need another discovery
+        now = time.monotonic()
+        self.discovered_devices[device.address] = (device, now)
+        # Queue the advertisement; the window gets them in batches
+        self.ad_buffer.append((summarize_advertisement(device, advertisement_data),
+                               device, advertisement_data, now * 1000.0))
+        if self.ad_flush_handle is None:
+            self.ad_flush_handle = self.loop.call_later(ADVERTISEMENT_BATCH_INTERVAL, self.flush_advertisements)
+    
+    def flush_advertisements(self):
+        """Emit all queued advertisements as one batch"""
+        self.ad_flush_handle = None
+        if self.ad_buffer:
+            batch, self.ad_buffer = self.ad_buffer, []
+            self.advertisements_batched.emit(batch)
+    
+    def get_connected(self, address):
+        """Return the DeviceState for an address if its client is still connected"""
+        state = self.devices.get(address)
+        if state is not None and state.client.is_connected:
+            return state
+        return None
+    
+    def get_discovered_device(self, address):
+        """Return the BLEDevice seen for an address during scanning, if it isn't stale"""
+        entry = self.discovered_devices.get(address)
+        if entry is None:
+            return None
+        device, seen = entry
+        if time.monotonic() - seen > DISCOVERED_DEVICE_TTL:
+            del self.discovered_devices[address]
+            return None
+        return device
+    
+    def expire_discovered_devices(self):
+        """Drop BLEDevices that haven't advertised within DISCOVERED_DEVICE_TTL"""
+        now = time.monotonic()
+        for address, (_, seen) in list(self.discovered_devices.items()):
+            if now - seen > DISCOVERED_DEVICE_TTL:
+                del self.discovered_devices[address]
+    
+    def start(self):
+        """Start processing commands on the current (qasync) event loop"""
+        self.loop = asyncio.get_event_loop()
+        self.task = self.loop.create_task(self.run_ble_loop())
+    
+    async def shutdown(self):
+        """Stop processing commands and disconnect all devices"""
+        if self.scan_task is not None:
+            self.scan_task.cancel()
+            try:
+                await self.scan_task
+            except asyncio.CancelledError:
+                pass
+            self.scan_task = None
+        
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        
+        for address, state in list(self.devices.items()):
+            state.cancel_consumers()
+            try:
+                await state.client.disconnect()
+            except Exception as e:
+                print(f"Error disconnecting {address}: {e}")
+        self.devices.clear()
+    
+    def _submit(self, command, args):
+        """Queue a command for run_ble_loop; callers are on the loop's own (Qt) thread"""
+        self.command_queue.put_nowait((command, args))
+    
+    def is_scanning(self):
+        return self.scan_task is not None and not self.scan_task.done()
     
     def scan_devices(self, scan_time=None):
-        asyncio.run_coroutine_threadsafe(self.command_queue.put(("scan", [scan_time])), self.loop)
+        # BlueZ rejects a second concurrent scan with InProgress, which can need an adapter reset
+        if self.is_scanning():
+            self.error_occurred.emit("Scan already running")
+            return
+        self.scan_task = self.loop.create_task(self.run_scan(scan_time))
+    
+    def stop_scan(self):
+        """Cancel a running scan; returns True if scan_finished will follow"""
+        if not self.is_scanning():
+            return False
+        self.scan_task.cancel()
+        return True
     
     def connect_device(self, address, timeout=None):
-        asyncio.run_coroutine_threadsafe(self.command_queue.put(("connect", [address, timeout])), self.loop)
+        self._submit("connect", [address, timeout])
     
     def disconnect_device(self, address):
-        asyncio.run_coroutine_threadsafe(self.command_queue.put(("disconnect", [address])), self.loop)
+        self._submit("disconnect", [address])
     
     def read_characteristic(self, address, char_uuid):
         # Debug output handled by main window
-        asyncio.run_coroutine_threadsafe(self.command_queue.put(("read", [address, char_uuid])), self.loop)
+        self._submit("read", [address, char_uuid])
     
     def write_characteristic(self, address, char_uuid, value, response=True):
-        asyncio.run_coroutine_threadsafe(self.command_queue.put(("write", [address, char_uuid, value, response])), self.loop)
+        self._submit("write", [address, char_uuid, value, response])
     
     def start_notify(self, address, char_uuid):
-        asyncio.run_coroutine_threadsafe(self.command_queue.put(("start_notify", [address, char_uuid])), self.loop)
+        self._submit("start_notify", [address, char_uuid])
     
     def stop_notify(self, address, char_uuid):
-        asyncio.run_coroutine_threadsafe(self.command_queue.put(("stop_notify", [address, char_uuid])), self.loop)
+        self._submit("stop_notify", [address, char_uuid])
         
     def check_connection_status(self, address):
-        asyncio.run_coroutine_threadsafe(self.command_queue.put(("check_connection", [address])), self.loop)
+        self._submit("check_connection", [address])
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from PyQt5.QtGui import QFont
+
+
+class DevRec:
+    """Per-device display data, extracted once per advertisement"""
+    __slots__ = ('device', 'address', 'address_lc', 'name', 'name_lc', 'rssi', 'mfg_hex', 'tooltip',
+                 'period', 'last_seen', 'fingerprint')
+    
+    def __init__(self, device, address):
+        self.device = device
+        self.address = address
+        self.address_lc = address.lower()  # Lowercase copies for the name/MAC filters
+        self.name = device.name if hasattr(device, 'name') else "Unknown Device"
+        self.name_lc = (self.name or "").lower()
+        self.rssi = None
+        self.mfg_hex = ""      # Lowercase hex of manufacturer data, used by the adv data filter
+        self.tooltip = ""
+        self.period = None     # Smallest interval between advertisements in ms
+        self.last_seen = None  # Timestamp of the last advertisement in ms
+        self.fingerprint = None  # Hash of the last stored AdvSummary
+    
+    def update(self, summary):
+        """Refresh name, RSSI and manufacturer data strings from an AdvSummary"""
+        if summary.name != self.name:
+            self.name = summary.name
+            self.name_lc = (self.name or "").lower()
+        self.rssi = summary.rssi
+        
+        mfg_data = [(company_code, bytes(data)) for company_code, data in summary.manufacturer_data
+                    if isinstance(data, (bytes, bytearray))]
+        
+        self.mfg_hex = b''.join(data for _, data in mfg_data).hex()
+        self.tooltip = "".join(
+            [f"Mfg: 0x{company_code:04x} Data: {data.hex(' ').upper()}\n" for company_code, data in mfg_data])
+    
+    def mark_seen(self, timestamp):
+        """Record an advertisement time; returns True if the advertisement period got shorter"""
+        period_changed = False
+        if self.last_seen is not None:
+            interval = timestamp - self.last_seen
+            if self.period is None or interval < self.period:
+                self.period = interval
+                period_changed = True
+        self.last_seen = timestamp
+        return period_changed
+    
+    def rssi_display(self):
+        return str(self.rssi) if self.rssi is not None else "N/A"
+    
+    def period_display(self):
+        return f"{self.period:.0f} ms" if self.period is not None else "N/A"
+
+
+class DeviceModel(QAbstractTableModel):
+    """Table model over the discovered devices, one DevRec per row in discovery order"""
+    
+    HEADERS = ["MAC Address", "Name", "RSSI", "Adv Period"]
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []          # DevRec instances
+        self._row_by_addr = {}   # Maps address -> row
+        self.name_font = QFont()
+        self.name_font.setBold(True)
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self._rows[index.row()]
+        column = index.column()
+        
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return record.address
+            if column == 1:
+                return record.name
+            if column == 2:
+                return record.rssi_display()
+            return record.period_display()
+        if role == Qt.ToolTipRole:
+            return record.tooltip or None
+        if role == Qt.FontRole and column == 1:
+            return self.name_font
+        if role == Qt.UserRole:
+            return record.device
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+    
+    def get(self, address):
+        """Return the DevRec for an address, or None"""
+        row = self._row_by_addr.get(address)
+        return self._rows[row] if row is not None else None
+    
+    def record(self, row):
+        return self._rows[row]
+    
+    def row_of(self, address):
+        return self._row_by_addr.get(address)
+    
+    def add(self, record):
+        """Append a newly discovered device"""
+        row = len(self._rows)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.append(record)
+        self._row_by_addr[record.address] = row
+        self.endInsertRows()
+    
+    def record_changed(self, record):
+        """Notify views that a device's name, RSSI or period changed"""
+        row = self._row_by_addr.get(record.address)
+        if row is not None:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1),
+                                  [Qt.DisplayRole, Qt.ToolTipRole])
+    
+    def set_records(self, records):
+        """Replace all rows in a single model reset instead of one insert per device"""
+        self.beginResetModel()
+        self._rows = list(records)
+        self._row_by_addr = {record.address: row for row, record in enumerate(self._rows)}
+        self.endResetModel()
+    
+    def clear(self):
+        self.set_records([])
+
+
+class DeviceFilterProxy(QSortFilterProxyModel):
+    """Filters DeviceModel rows by name, MAC address, minimum RSSI and manufacturer data hex"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.name_filter = ""
+        self.mac_filter = ""
+        self.min_rssi = None
+        self.adv_hex = ""
+    
+    def set_name_filter(self, text):
+        self._set_filter('name_filter', text.lower())
+    
+    def set_mac_filter(self, text):
+        self._set_filter('mac_filter', text.lower())
+    
+    def set_min_rssi(self, text):
+        try:
+            min_rssi = int(text) if text else None
+        except ValueError:
+            min_rssi = None
+        self._set_filter('min_rssi', min_rssi)
+    
+    def set_adv_hex(self, text):
+        self._set_filter('adv_hex', text.strip().lower().replace(" ", ""))
+    
+    def _set_filter(self, attr_name, value):
+        """Store a parsed filter value, re-filtering only if it actually changed"""
+        if getattr(self, attr_name) != value:
+            setattr(self, attr_name, value)
+            self.invalidateFilter()
+    
+    def filterAcceptsRow(self, source_row, source_parent):
+        record = self.sourceModel().record(source_row)
+        
+        # Apply name filter
+        if self.name_filter and self.name_filter not in record.name_lc:
+            return False
+        
+        # Apply MAC filter
+        if self.mac_filter and self.mac_filter not in record.address_lc:
+            return False
+            
+        # Apply RSSI filter
+        if self.min_rssi is not None and (record.rssi is None or record.rssi < self.min_rssi):
+            return False
+        
+        # Apply advertisement data filter
+        if self.adv_hex and self.adv_hex not in record.mfg_hex:
+            return False
+        
+        return True
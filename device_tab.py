@@ -1,8 +1,44 @@
 #!/usr/bin/env python3
+import time
+import collections
+from datetime import datetime
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-                            QLabel, QTextEdit, QTreeWidget, QTreeWidgetItem,
+                            QLabel, QTextEdit, QPlainTextEdit, QTreeWidget, QTreeWidgetItem,
                             QTabWidget, QSplitter, QLineEdit)
-from PyQt5.QtCore import Qt, QTimer, QDateTime
+from PyQt5.QtCore import Qt, QTimer
+from util import try_decode_ascii
+
+# Notification log lines kept between flushes, and how often they are flushed (ms)
+LOG_BUFFER_SIZE = 2000
+LOG_FLUSH_INTERVAL = 100
+
+# Longest values decoded as text / as a little-endian integer in the value display
+MAX_ASCII_DISPLAY_LENGTH = 512
+MAX_INT_DISPLAY_LENGTH = 8
+
+# Display labels for the characteristic properties shown in the tree, in display order
+PROPERTY_LABELS = {
+    "read": "Read",
+    "write": "Write",
+    "write-without-response": "Write No Response",
+    "notify": "Notify",
+    "indicate": "Indicate",
+}
+
+# Item data role holding a characteristic's properties as a frozenset
+PROPERTIES_ROLE = Qt.UserRole + 1
+
+# (second, "hh:mm:ss") of the last notification timestamp; only reformatted when the second changes
+_timestamp_cache = (None, "")
+
+def notification_timestamp():
+    """Current local time as hh:mm:ss.zzz"""
+    global _timestamp_cache
+    now = time.time()
+    second = int(now)
+    if second != _timestamp_cache[0]:
+        _timestamp_cache = (second, datetime.fromtimestamp(second).strftime("%H:%M:%S"))
+    return f"{_timestamp_cache[1]}.{int((now - second) * 1000):03d}"
 
 class DeviceTab(QWidget):
     """Widget representing a connected device tab"""
@@ -68,12 +104,20 @@ class DeviceTab(QWidget):
         notify_tab = QWidget()
         notify_layout = QVBoxLayout(notify_tab)
         
-        self.notification_log = QTextEdit()
+        # QPlainTextEdit appends far cheaper than QTextEdit's rich text document
+        self.notification_log = QPlainTextEdit()
         self.notification_log.setReadOnly(True)
         notify_layout.addWidget(self.notification_log)
         
+        # Notifications are buffered and written to the log in one call per interval
+        self.log_buffer = collections.deque(maxlen=LOG_BUFFER_SIZE)
+        self.log_timer = QTimer(self)
+        self.log_timer.setInterval(LOG_FLUSH_INTERVAL)
+        self.log_timer.timeout.connect(self.flush_log)
+        self.log_timer.start()
+        
         clear_button = QPushButton("Clear Log")
-        clear_button.clicked.connect(self.notification_log.clear)
+        clear_button.clicked.connect(self.clear_log)
         notify_layout.addWidget(clear_button)
         
         # Add tabs
@@ -96,36 +140,41 @@ class DeviceTab(QWidget):
     
     def update_services(self, services):
         """Update the services tree with the device's services"""
-        self.service_tree.clear()
-        
-        for uuid, service in services.items():
-            service_item = QTreeWidgetItem(self.service_tree)
-            service_item.setText(0, f"Service: {service.description if hasattr(service, 'description') else ''}")
-            service_item.setText(1, str(service.uuid))
-            service_item.setExpanded(True)
+        # Build the items detached and add them in one go, so the tree lays out once
+        self.service_tree.setUpdatesEnabled(False)
+        self.service_tree.blockSignals(True)
+        try:
+            self.service_tree.clear()
             
-            for char in service.characteristics:
-                char_item = QTreeWidgetItem(service_item)
-                char_item.setText(0, f"Characteristic: {char.description if hasattr(char, 'description') else ''}")
-                char_item.setText(1, str(char.uuid))
-                
-                props = []
-                # Handle properties as a list
-                if hasattr(char, 'properties'):
-                    properties = char.properties
-                    if "read" in properties:
-                        props.append("Read")
-                    if "write" in properties:
-                        props.append("Write")
-                    if "write-without-response" in properties:
-                        props.append("Write No Response")
-                    if "notify" in properties:
-                        props.append("Notify")
-                    if "indicate" in properties:
-                        props.append("Indicate")
+            # Older Bleak versions hand out a dict-like collection, newer ones iterate over services directly
+            if hasattr(services, 'values'):
+                services = services.values()
+            
+            top_items = []
+            for service in services:
+                service_item = QTreeWidgetItem([
+                    f"Service: {service.description if hasattr(service, 'description') else ''}",
+                    str(service.uuid)])
+                top_items.append(service_item)
                 
-                char_item.setText(2, ", ".join(props))
-                char_item.setData(0, Qt.UserRole, char)
+                for char in service.characteristics:
+                    # Bleak reports properties as a list; keep a frozenset for cheap lookups on selection
+                    props_set = frozenset(getattr(char, 'properties', ()))
+                    props = ", ".join([label for prop, label in PROPERTY_LABELS.items() if prop in props_set])
+                    
+                    char_item = QTreeWidgetItem(service_item, [
+                        f"Characteristic: {char.description if hasattr(char, 'description') else ''}",
+                        str(char.uuid),
+                        props])
+                    char_item.setData(0, Qt.UserRole, char)
+                    char_item.setData(0, PROPERTIES_ROLE, props_set)
+            
+            self.service_tree.addTopLevelItems(top_items)
+            # Items can only be expanded once they are in the tree
+            self.service_tree.expandAll()
+        finally:
+            self.service_tree.blockSignals(False)
+            self.service_tree.setUpdatesEnabled(True)
     
     def characteristic_selected(self, item, column=0):
         """Handle characteristic selection in the tree"""
@@ -135,7 +184,7 @@ class DeviceTab(QWidget):
             self.current_characteristic = char_data
             
             # Enable/disable buttons based on properties
-            properties = char_data.properties if hasattr(char_data, 'properties') else []
+            properties = item.data(0, PROPERTIES_ROLE) or frozenset()
             self.read_button.setEnabled(self.connected and "read" in properties)
             self.write_button.setEnabled(
                 self.connected and (
@@ -179,9 +228,19 @@ class DeviceTab(QWidget):
         """Update the displayed value for a characteristic"""
         # Debug output handled by main window
         if self.current_characteristic and str(self.current_characteristic.uuid) == char_uuid:
-            # Display as hex
-            hex_value = " ".join([f"{b:02X}" for b in value])
-            text_value = f"Hex: {hex_value}\n\nASCII: {self.try_decode_ascii(value)}\n\nInt: {int.from_bytes(value, byteorder='little') if len(value) <= 8 else 'Too long'}"
+            # Display as hex, and as text/int only where that can make sense; large values are
+            # nearly always binary, so don't spend time decoding them
+            length = len(value)
+            parts = ["Hex: " + value.hex(" ").upper()]
+            if length <= MAX_ASCII_DISPLAY_LENGTH:
+                parts.append("ASCII: " + try_decode_ascii(value))
+            else:
+                parts.append("ASCII: Too long")
+            if length <= MAX_INT_DISPLAY_LENGTH:
+                parts.append(f"Int: {int.from_bytes(value, byteorder='little')}")
+            else:
+                parts.append("Int: Too long")
+            text_value = "\n\n".join(parts)
             # Debug output handled by main window
             self.value_display.setText(text_value)
         else:
@@ -190,21 +249,22 @@ class DeviceTab(QWidget):
     
     def handle_notification(self, char_uuid, data):
         """Handle a notification from a characteristic"""
-        hex_value = " ".join([f"{b:02X}" for b in data])
-        timestamp = QDateTime.currentDateTime().toString("hh:mm:ss.zzz")
+        hex_value = data.hex(" ").upper()
+        timestamp = notification_timestamp()
         
-        self.notification_log.append(f"[{timestamp}] {char_uuid}:\nHex: {hex_value}\nASCII: {self.try_decode_ascii(data)}\n")
+        self.log_buffer.append(f"[{timestamp}] {char_uuid}:\nHex: {hex_value}\nASCII: {try_decode_ascii(data)}\n")
         
         # If this is the currently selected characteristic, update the value display too
         if self.current_characteristic and str(self.current_characteristic.uuid) == char_uuid:
             self.update_characteristic_value(char_uuid, data)
     
-    def try_decode_ascii(self, data):
-        """Try to decode binary data as ASCII or UTF-8"""
-        try:
-            return data.decode('ascii')
-        except:
-            try:
-                return data.decode('utf-8')
-            except:
-                return "(not text)"
+    def flush_log(self):
+        """Write buffered notification lines to the log"""
+        if not self.log_buffer:
+            return
+        self.notification_log.appendPlainText("\n".join(self.log_buffer))
+        self.log_buffer.clear()
+    
+    def clear_log(self):
+        self.log_buffer.clear()
+        self.notification_log.clear()
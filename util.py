@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+
+
+def try_decode_ascii(data):
+    """Try to decode binary data as ASCII or UTF-8"""
+    # isascii() is a single C scan, so plain ASCII payloads never raise
+    if data.isascii():
+        return data.decode('ascii')
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return "(not text)"